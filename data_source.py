@@ -1,4 +1,12 @@
-from fastapi import FastAPI, HTTPException
+from collections import Counter
+from operator import itemgetter
+from uuid import uuid4
+
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from pydantic import BaseModel
 
 app = FastAPI()
 
@@ -11,77 +19,208 @@ VEHICLES = {
     "105": {"make": "Nissan", "model": "NV200", "status": "In Port", "destination": "Trincomalee"},
 }
 
+# Column-wise search index kept alongside VEHICLES, which stays the source
+# of truth for lookups and writes. Row i of SEARCH_DF belongs to IDS[i] and
+# holds that vehicle's lowercased fields, so searches run as vectorized
+# string scans over whole columns.
+SEARCH_FIELDS = ("make", "model", "status", "destination")
+IDS = list(VEHICLES)
+ROWS = {vid: i for i, vid in enumerate(IDS)}
+SEARCH_DF = pd.DataFrame(
+    [[VEHICLES[vid][field] for field in SEARCH_FIELDS] for vid in IDS],
+    columns=list(SEARCH_FIELDS),
+).apply(lambda col: col.str.lower())
+
+def _index_vehicle(vehicle_id: str, details: dict):
+    """Append a newly added vehicle to the search index."""
+    # build the row first so nothing is touched if a field can't be lowered
+    search_row = [details[field].lower() for field in SEARCH_FIELDS]
+    row = len(IDS)
+    SEARCH_DF.loc[row] = search_row
+    ROWS[vehicle_id] = row
+    IDS.append(vehicle_id)
+
+# Inventory counts kept up to date by add/PATCH so the summary is O(1).
+STATUS_COUNTS = Counter(map(itemgetter("status"), VEHICLES.values()))
+DEST_COUNTS = Counter(map(itemgetter("destination"), VEHICLES.values()))
+
+def _move_status(old: str, new: str):
+    STATUS_COUNTS[old] -= 1
+    if not STATUS_COUNTS[old]:
+        del STATUS_COUNTS[old]
+    STATUS_COUNTS[new] += 1
+
+# The vehicle schema is fixed, so rows are built field by field rather than
+# through a generic `{"id": vid, **details}` merge.
+_ROW_FIELDS = itemgetter("make", "model", "status", "destination")
+
+def _row(vehicle_id: str, details: dict) -> dict:
+    make, model, status, destination = _ROW_FIELDS(details)
+    return {"id": vehicle_id, "make": make, "model": model,
+            "status": status, "destination": destination}
+
+# Each flat row pre-encoded as JSON, in IDS order, shared by list and search
+# so their bodies are just joins. Built on first use and dropped whenever a
+# vehicle is added or updated.
+_ROW_BYTES: list[bytes] | None = None
+
+def _row_bytes() -> list[bytes]:
+    global _ROW_BYTES
+    if _ROW_BYTES is None:
+        _ROW_BYTES = [orjson.dumps(_row(vid, details)) for vid, details in VEHICLES.items()]
+    return _ROW_BYTES
+
+def _json_array(rows: list[bytes]) -> bytes:
+    return b"[" + b",".join(rows) + b"]"
+
+# Every write bumps VERSION, which keys the serialized response bodies in
+# _CACHE and, prefixed with a per-process _BOOT token, forms the weak ETag
+# for all GETs. The token keeps tags from a restarted process or a sibling
+# worker (whose VERSION also counts up from 0) from matching this one's.
+_BOOT = uuid4().hex
+VERSION = 0
+_CACHE: dict[tuple, bytes] = {}
+_CACHE_MAX = 1024
+
+def _invalidate_caches():
+    """Drop derived views after VEHICLES has been modified."""
+    global _ROW_BYTES, VERSION
+    _ROW_BYTES = None
+    VERSION += 1
+    _CACHE.clear()
+
+def _cached_json(request: Request, build) -> Response:
+    """Serve `build()` as JSON, honouring If-None-Match and reusing bytes.
+
+    `build` is only called on a cache miss, so repeated reads of unchanged
+    data skip both the handler work and serialization. It may return
+    already-encoded JSON bytes, which are used as-is.
+    """
+    etag = f'W/"{_BOOT}-{VERSION}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())), VERSION)
+    body = _CACHE.get(key)
+    if body is None:
+        if len(_CACHE) >= _CACHE_MAX:
+            _CACHE.clear()
+        body = build()
+        if not isinstance(body, bytes):
+            body = orjson.dumps(body)
+        _CACHE[key] = body
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
 @app.get("/vehicles")
-async def list_vehicles():
+async def list_vehicles(request: Request) -> Response:
     # Return a flat list suitable for inventory display
-    return [{"id": vid, **details} for vid, details in VEHICLES.items()]
+    return _cached_json(request, lambda: _json_array(_row_bytes()))
 
 @app.get("/vehicles/search")
-async def search_vehicles(make: str | None = None,
+async def search_vehicles(request: Request,
+                          make: str | None = None,
                           model: str | None = None,
                           status: str | None = None,
-                          destination: str | None = None):
+                          destination: str | None = None) -> Response:
     """Search vehicles by optional criteria.
 
     Each query parameter is case-insensitive and will match if it appears anywhere
     in the corresponding vehicle field. When multiple parameters are provided the
     result is the intersection of all filters.
     """
-    def match(value: str, term: str) -> bool:
-        return term.lower() in value.lower()
-
-    results = []
-    for vid, info in VEHICLES.items():
-        if make and not match(info.get("make", ""), make):
-            continue
-        if model and not match(info.get("model", ""), model):
-            continue
-        if status and not match(info.get("status", ""), status):
-            continue
-        if destination and not match(info.get("destination", ""), destination):
-            continue
-        results.append({"id": vid, **info})
-    return results
+    filters = {"make": make, "model": model, "status": status, "destination": destination}
+
+    def build():
+        mask = np.ones(len(IDS), dtype=bool)
+        for field, term in filters.items():
+            if term:
+                mask &= SEARCH_DF[field].str.contains(term.lower(), regex=False).to_numpy()
+        rows = _row_bytes()
+        return _json_array([rows[i] for i in np.flatnonzero(mask)])
+
+    return _cached_json(request, build)
+
+@app.get("/vehicles/summary")
+async def inventory_summary(request: Request) -> Response:
+    """Vehicle counts grouped by status and by destination."""
+    return _cached_json(request, lambda: {"status": STATUS_COUNTS, "destination": DEST_COUNTS})
+
+@app.get("/vehicles/ids")
+async def list_vehicle_ids(request: Request) -> Response:
+    """Just the vehicle IDs, for clients that only need to quote them."""
+    return _cached_json(request, lambda: IDS)
+
+@app.get("/vehicles/bulk")
+async def get_vehicles_bulk(request: Request, ids: list[str] = Query(...)) -> Response:
+    """Look up several vehicles at once.
+
+    Returns an object mapping each known ID to its record; unknown IDs are
+    simply left out so callers can tell them apart from found ones.
+    """
+    return _cached_json(request, lambda: {vid: VEHICLES[vid] for vid in ids if vid in VEHICLES})
 
 @app.get("/vehicles/{vehicle_id}")
-async def get_vehicle(vehicle_id: str):
-    if vehicle_id not in VEHICLES:
+async def get_vehicle(request: Request, vehicle_id: str) -> Response:
+    vehicle = VEHICLES.get(vehicle_id)
+    if vehicle is None:
         raise HTTPException(status_code=404, detail="Vehicle not found")
-    return VEHICLES[vehicle_id]
+    return _cached_json(request, lambda: vehicle)
+
+class VehicleIn(BaseModel):
+    make: str
+    model: str
+    status: str
+    destination: str
 
 @app.post("/vehicles")
-async def add_vehicle(vehicle: dict):
+async def add_vehicle(vehicle: VehicleIn) -> dict[str, str]:
     """Add a new vehicle to the mock database.
 
-    The request body must include `make`, `model`, `status`, and `destination`.
+    The request body must include `make`, `model`, `status`, and `destination`
+    as strings; anything else is rejected before the store is touched.
     A new ID is generated automatically by incrementing the highest existing ID.
     """
-    required = {"make", "model", "status", "destination"}
-    if not required.issubset(vehicle.keys()):
-        raise HTTPException(status_code=400, detail=f"Missing fields: {required - set(vehicle.keys())}")
-
     # generate the next numeric ID as a string
     try:
         next_id = str(int(max(VEHICLES.keys(), default="0")) + 1)
     except ValueError:
         next_id = "1"
 
-    VEHICLES[next_id] = {
-        "make": vehicle["make"],
-        "model": vehicle["model"],
-        "status": vehicle["status"],
-        "destination": vehicle["destination"],
-    }
-    return {"id": next_id, **VEHICLES[next_id]}
+    details = vehicle.model_dump()
+    _index_vehicle(next_id, details)
+    VEHICLES[next_id] = details
+    STATUS_COUNTS[details["status"]] += 1
+    DEST_COUNTS[details["destination"]] += 1
+    _invalidate_caches()
+    return _row(next_id, details)
 
 @app.patch("/vehicles/{vehicle_id}")
-async def update_vehicle_status(vehicle_id: str, status: str):
+async def update_vehicle_status(vehicle_id: str, status: str) -> dict[str, str]:
     """Update only the status field of a vehicle.  Raises 404 if not found."""
-    if vehicle_id not in VEHICLES:
+    vehicle = VEHICLES.get(vehicle_id)
+    if vehicle is None:
         raise HTTPException(status_code=404, detail="Vehicle not found")
-    VEHICLES[vehicle_id]["status"] = status
-    return {"id": vehicle_id, **VEHICLES[vehicle_id]}
+    _move_status(vehicle["status"], status)
+    vehicle["status"] = status
+    SEARCH_DF.at[ROWS[vehicle_id], "status"] = status.lower()
+    _invalidate_caches()
+    return _row(vehicle_id, vehicle)
 
 if __name__ == "__main__":
+    import os
+
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8001)
\ No newline at end of file
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    # Each worker process holds its own copy of the mock VEHICLES store, so
+    # only raise this for read-only use; writes are not shared between them.
+    raw_workers = os.getenv("DATA_SOURCE_WORKERS", "1")
+    try:
+        workers = int(raw_workers)
+    except ValueError:
+        workers = 0
+    if workers < 1:
+        raise SystemExit(f"DATA_SOURCE_WORKERS must be a whole number >= 1, got {raw_workers!r}")
+    # loop/http default to "auto", which picks up uvloop and httptools
+    # whenever they are installed
+    uvicorn.run("data_source:app", host="127.0.0.1", port=8001, workers=workers)
\ No newline at end of file
@@ -1,11 +1,13 @@
 import asyncio
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
 from mcp import ClientSession, StdioServerParameters
-from mcp import ClientSession
-from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamable_http_client
 
 load_dotenv()
 
@@ -21,11 +23,39 @@ def clean_schema(schema):
         return cleaned
     return schema
 
-async def main():
-    # 1. Configuration for the MCP Server
-    server_url = "http://localhost:8000/sse"
+# Tool round-trips (model function call + tool response) resent to Gemini on
+# each hop. Older rounds are dropped so request size stays bounded instead of
+# growing with every tool call.
+MAX_TOOL_ROUNDS_IN_HISTORY = 3
+
+def trim_history(contents):
+    """Keep the user query plus the most recent tool round-trips"""
+    keep = 1 + 2 * MAX_TOOL_ROUNDS_IN_HISTORY
+    if len(contents) <= keep:
+        return contents
+    return [contents[0], *contents[-(keep - 1):]]
+
+def connect_mcp_server():
+    """Open a transport to the MCP server.
 
-    async with sse_client(server_url) as (read, write):
+    By default mcp_server.py is spawned as a subprocess and spoken to over
+    stdio, which avoids TCP and HTTP framing entirely. Set MCP_SERVER_URL
+    (e.g. http://localhost:8000/mcp) to reach a server started with
+    MCP_TRANSPORT=http over streamable HTTP instead.
+    """
+    server_url = os.getenv("MCP_SERVER_URL")
+    if server_url:
+        return streamable_http_client(server_url)
+    server_params = StdioServerParameters(
+        command=sys.executable,
+        args=[str(Path(__file__).with_name("mcp_server.py"))],
+    )
+    return stdio_client(server_params)
+
+async def main():
+    # 1. Connect to the MCP Server
+    async with connect_mcp_server() as streams:
+        read, write = streams[0], streams[1]
         async with ClientSession(read, write) as session:
             await session.initialize() 
             # 2. Get tools from MCP server and convert them for Gemini
@@ -47,7 +77,6 @@ async def main():
             model_id = "gemini-2.5-flash" 
 
             # determine user query: prefer command-line args, otherwise prompt
-            import sys
             if len(sys.argv) > 1:
                 user_query = " ".join(sys.argv[1:])
             else:
@@ -59,7 +88,7 @@ async def main():
                 print(f" - {t.name}: {t.description} (inputSchema={t.inputSchema})")
 
             try:
-                response = client.models.generate_content(
+                response = await client.aio.models.generate_content(
                     model=model_id,
                     contents=user_query,
                     config=types.GenerateContentConfig(tools=gemini_tools)
@@ -76,22 +105,30 @@ async def main():
 
             final_answer = None
             while True:
-                parts = response.candidates[0].content.parts
-                if parts and parts[0].function_call:
-                    fc = parts[0].function_call
-                    print(f"--- Gemini requested tool: {fc.name} with args {fc.args} ---")
-                    result = await session.call_tool(fc.name, fc.args)
-                    # debug: show raw result object
-                    print(f"TOOL RAW RESULT: {result}")
-                    tool_text = result.content[0].text
-                    print(f"TOOL TEXT: {tool_text}")
-                    # append tool response to conversation
-                    conversation_contents.append(types.Content(role="tool", parts=[
-                        types.Part.from_function_response(name=fc.name, response={"result": tool_text})
-                    ]))
+                parts = response.candidates[0].content.parts or []
+                function_calls = [part.function_call for part in parts if part.function_call]
+                if function_calls:
+                    for fc in function_calls:
+                        print(f"--- Gemini requested tool: {fc.name} with args {fc.args} ---")
+                    # run every tool requested in this turn concurrently
+                    results = await asyncio.gather(
+                        *(session.call_tool(fc.name, fc.args) for fc in function_calls)
+                    )
+                    tool_parts = []
+                    for fc, result in zip(function_calls, results):
+                        # debug: show raw result object
+                        print(f"TOOL RAW RESULT: {result}")
+                        tool_text = result.content[0].text
+                        print(f"TOOL TEXT: {tool_text}")
+                        tool_parts.append(
+                            types.Part.from_function_response(name=fc.name, response={"result": tool_text})
+                        )
+                    # append all tool responses to conversation as one turn
+                    conversation_contents.append(types.Content(role="tool", parts=tool_parts))
+                    conversation_contents = trim_history(conversation_contents)
                     # ask model again with updated conversation
                     try:
-                        response = client.models.generate_content(
+                        response = await client.aio.models.generate_content(
                             model=model_id,
                             contents=conversation_contents,
                             config=types.GenerateContentConfig(tools=gemini_tools)
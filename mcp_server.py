@@ -1,12 +1,144 @@
+import asyncio
+import functools
+import inspect
+import os
+import time
+from contextlib import asynccontextmanager
+
 import httpx
 from fastmcp import FastMCP
 
+DATA_SOURCE_URL = "http://127.0.0.1:8001" # Or localhost:8001
+
+# One pooled client shared by every tool so requests reuse keep-alive
+# connections instead of paying a fresh connect per call.
+_HTTP = httpx.AsyncClient(
+    base_url=DATA_SOURCE_URL,
+    timeout=5.0,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+)
+
+@asynccontextmanager
+async def lifespan(server):
+    try:
+        yield {}
+    finally:
+        await _HTTP.aclose()
+
 # Initialize the MCP Server
-mcp = FastMCP("VehicleExportServer")
+mcp = FastMCP("VehicleExportServer", lifespan=lifespan)
 
-DATA_SOURCE_URL = "http://127.0.0.1:8001" # Or localhost:8001
+def http_tool(action: str):
+    """Turn data source failures inside a tool into agent-readable errors.
+
+    `action` completes the messages, e.g. "Error: timeout while searching
+    vehicles." It is a format string over the tool's arguments, so
+    "fetching details for vehicle {vehicle_id}" names the ID involved. The
+    wrapped tool only needs to handle the happy path and the HTTP status
+    codes it cares about.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        def describe(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return action.format(**bound.arguments)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await fn(*args, **kwargs)
+            except httpx.TimeoutException:
+                return (f"Error: timeout while {describe(args, kwargs)}. "
+                        f"Ensure the server at {DATA_SOURCE_URL} is running.")
+            except Exception as e:
+                return f"Error {describe(args, kwargs)}: {e}"
+        return wrapper
+    return decorator
+
+# IDs quoted as suggestions in not-found errors. Refreshed from the cheap
+# /vehicles/ids endpoint at most every _IDS_TTL seconds, or sooner after
+# this server adds a vehicle.
+_IDS_TTL = 30.0
+_KNOWN_IDS: tuple[str, ...] = ()
+_IDS_FETCHED_AT = float("-inf")
+
+async def _known_ids() -> tuple[str, ...]:
+    """IDs to suggest; falls back to the last known (possibly empty) set if
+    the refresh fails, so callers can still report the not-found itself."""
+    global _KNOWN_IDS, _IDS_FETCHED_AT
+    if time.monotonic() - _IDS_FETCHED_AT > _IDS_TTL:
+        try:
+            response = await _HTTP.get("/vehicles/ids")
+            response.raise_for_status()
+            _KNOWN_IDS = tuple(response.json())
+            _IDS_FETCHED_AT = time.monotonic()
+        except (httpx.HTTPError, ValueError):
+            pass
+    return _KNOWN_IDS
+
+# Vehicle lookups arriving within _BATCH_WINDOW seconds of each other are
+# coalesced into one GET /vehicles/bulk; concurrent lookups of the same ID
+# share a single future.
+_BATCH_WINDOW = 0.01
+_BATCH_MAX = 32
+_pending: dict[str, asyncio.Future] = {}
+_flusher: asyncio.Task | None = None
+_inflight: set[asyncio.Task] = set()
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _inflight.add(task)
+    task.add_done_callback(_inflight.discard)
+    return task
+
+def _take_pending() -> dict[str, asyncio.Future]:
+    batch = dict(_pending)
+    _pending.clear()
+    return batch
+
+async def _flush(batch: dict[str, asyncio.Future]):
+    if not batch:
+        return
+    try:
+        response = await _HTTP.get("/vehicles/bulk", params={"ids": list(batch)})
+        response.raise_for_status()
+        found = response.json()
+    except Exception as e:
+        for fut in batch.values():
+            if not fut.done():
+                fut.set_exception(e)
+        return
+    for vid, fut in batch.items():
+        if not fut.done():
+            fut.set_result(found.get(vid))
+
+async def _flush_after_window():
+    global _flusher
+    await asyncio.sleep(_BATCH_WINDOW)
+    _flusher = None
+    await _flush(_take_pending())
+
+def _fetch_vehicle(vehicle_id: str) -> asyncio.Future:
+    """Queue a batched lookup; resolves to the record, or None if unknown."""
+    global _flusher
+    fut = _pending.get(vehicle_id)
+    if fut is None:
+        fut = asyncio.get_running_loop().create_future()
+        _pending[vehicle_id] = fut
+        if len(_pending) >= _BATCH_MAX:
+            if _flusher is not None:
+                _flusher.cancel()
+                _flusher = None
+            # take the batch now so later lookups start a fresh one
+            _spawn(_flush(_take_pending()))
+        elif _flusher is None:
+            _flusher = _spawn(_flush_after_window())
+    return fut
 
 @mcp.tool()
+@http_tool("fetching details for vehicle {vehicle_id}")
 async def get_vehicle_details(vehicle_id: str) -> str:
     """Retrieve a single vehicle's current information using its unique ID.
 
@@ -14,33 +146,25 @@ async def get_vehicle_details(vehicle_id: str) -> str:
     vehicle's identifier. If the ID does not exist, the tool returns a clear
     message so the upstream agent can decide to search or try another ID.
     """
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{DATA_SOURCE_URL}/vehicles/{vehicle_id}")
-            if response.status_code == 200:
-                data = response.json()
-                return f"Vehicle {vehicle_id}: {data['make']} {data['model']} is currently {data['status']} heading to {data['destination']}."
-            # explicit not found case
-            if response.status_code == 404:
-                # attempt to help by listing nearby ids
-                vehicles = await list_vehicles_internal()
-                close = ", ".join(v['id'] for v in vehicles[:3])
-                return f"Error: Vehicle {vehicle_id} not found. Nearby IDs: {close}"
-            return f"Error: Could not find details for vehicle {vehicle_id}."
-    except httpx.TimeoutException:
-        return f"Error: Request to data source timed out for vehicle {vehicle_id}. Ensure the server at {DATA_SOURCE_URL} is running."
-    except Exception as e:
-        return f"Error: Could not fetch details for vehicle {vehicle_id}: {str(e)}"
+    # shield so one cancelled caller doesn't cancel a lookup others share
+    data = await asyncio.shield(_fetch_vehicle(vehicle_id))
+    if data is not None:
+        return f"Vehicle {vehicle_id}: {data['make']} {data['model']} is currently {data['status']} heading to {data['destination']}."
+    # explicit not found case: attempt to help by listing nearby ids
+    close = ", ".join((await _known_ids())[:3])
+    if not close:
+        return f"Error: Vehicle {vehicle_id} not found."
+    return f"Error: Vehicle {vehicle_id} not found. Nearby IDs: {close}"
 
 # internal helper to avoid repeating the same http call
 async def list_vehicles_internal():
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        response = await client.get(f"{DATA_SOURCE_URL}/vehicles")
-        if response.status_code == 200:
-            return response.json()
-        return []
+    response = await _HTTP.get("/vehicles")
+    if response.status_code == 200:
+        return response.json()
+    return []
 
 @mcp.tool()
+@http_tool("fetching vehicle list")
 async def list_vehicles() -> str:
     """Return every vehicle currently stored, one per line.
 
@@ -49,22 +173,18 @@ async def list_vehicles() -> str:
     for an agent to consume. Prefer `inventory_summary` or `search_vehicles`
     for more targeted queries.
     """
-    try:
-        vehicles = await list_vehicles_internal()
-        if vehicles:
-            return "\n".join([
-                f"Vehicle {v['id']}: {v['make']} {v['model']} is currently {v['status']} heading to {v['destination']}"
-                for v in vehicles
-            ])
-        return "Error: Could not retrieve vehicle list."
-    except httpx.TimeoutException:
-        return f"Error: Request to data source timed out. Ensure the server at {DATA_SOURCE_URL} is running."
-    except Exception as e:
-        return f"Error: Could not fetch vehicle list: {str(e)}"
+    vehicles = await list_vehicles_internal()
+    if vehicles:
+        return "\n".join([
+            f"Vehicle {v['id']}: {v['make']} {v['model']} is currently {v['status']} heading to {v['destination']}"
+            for v in vehicles
+        ])
+    return "Error: Could not retrieve vehicle list."
 
 # --- new smart agent tools ---
 
 @mcp.tool()
+@http_tool("searching vehicles")
 async def search_vehicles(make: str | None = None,
                           model: str | None = None,
                           status: str | None = None,
@@ -77,34 +197,29 @@ async def search_vehicles(make: str | None = None,
     exact identifiers. If no results are found, the response explains and may
     offer suggestions to broaden the query.
     """
-    try:
-        params = {}
-        if make:
-            params['make'] = make
-        if model:
-            params['model'] = model
-        if status:
-            params['status'] = status
-        if destination:
-            params['destination'] = destination
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{DATA_SOURCE_URL}/vehicles/search", params=params)
-            if response.status_code == 200:
-                hits = response.json()
-                if not hits:
-                    return ("No vehicles matched your criteria. "
-                            "Try relaxing one of the filters or check spelling.")
-                return "\n".join([
-                    f"Vehicle {v['id']}: {v['make']} {v['model']} is {v['status']} heading to {v['destination']}"
-                    for v in hits
-                ])
-            return "Error: search endpoint returned unexpected status."
-    except httpx.TimeoutException:
-        return "Error: timeout while searching vehicles."
-    except Exception as e:
-        return f"Error during search: {e}"
+    params = {}
+    if make:
+        params['make'] = make
+    if model:
+        params['model'] = model
+    if status:
+        params['status'] = status
+    if destination:
+        params['destination'] = destination
+    response = await _HTTP.get("/vehicles/search", params=params)
+    if response.status_code == 200:
+        hits = response.json()
+        if not hits:
+            return ("No vehicles matched your criteria. "
+                    "Try relaxing one of the filters or check spelling.")
+        return "\n".join([
+            f"Vehicle {v['id']}: {v['make']} {v['model']} is {v['status']} heading to {v['destination']}"
+            for v in hits
+        ])
+    return "Error: search endpoint returned unexpected status."
 
 @mcp.tool()
+@http_tool("generating inventory summary")
 async def inventory_summary() -> str:
     """Provide a condensed overview of the current fleet.
 
@@ -112,53 +227,42 @@ async def inventory_summary() -> str:
     of the inventory so it can answer questions like "How many cars are in port?"
     without iterating over every record. Use this before launching wide queries.
     """
-    try:
-        vehicles = await list_vehicles_internal()
-        if not vehicles:
-            return "Inventory is empty."
-        status_counts = {}
-        destination_counts = {}
-        for v in vehicles:
-            status_counts[v['status']] = status_counts.get(v['status'], 0) + 1
-            destination_counts[v['destination']] = destination_counts.get(v['destination'], 0) + 1
-        status_lines = [f"{k}: {c}" for k, c in status_counts.items()]
-        dest_lines = [f"{k}: {c}" for k, c in destination_counts.items()]
-        return (
-            "Status counts:\n" + "\n".join(status_lines) +
-            "\nDestination counts:\n" + "\n".join(dest_lines)
-        )
-    except Exception as e:
-        return f"Error generating inventory summary: {e}"
+    response = await _HTTP.get("/vehicles/summary")
+    response.raise_for_status()
+    summary = response.json()
+    if not summary["status"]:
+        return "Inventory is empty."
+    status_lines = "\n".join(f"{k}: {c}" for k, c in summary["status"].items())
+    dest_lines = "\n".join(f"{k}: {c}" for k, c in summary["destination"].items())
+    return f"Status counts:\n{status_lines}\nDestination counts:\n{dest_lines}"
 
 @mcp.tool()
+@http_tool("adding vehicle")
 async def add_vehicle(make: str, model: str, status: str, destination: str) -> str:
     """Create a new vehicle record in the data source.
 
     Agents should call this when they know all required fields and want to
     add inventory. The data source returns the new ID and details on success.
     """
-    try:
-        payload = {
-            "make": make,
-            "model": model,
-            "status": status,
-            "destination": destination,
-        }
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.post(f"{DATA_SOURCE_URL}/vehicles", json=payload)
-            if response.status_code in (200, 201):
-                data = response.json()
-                return (
-                    f"Added vehicle {data['id']}: {data['make']} {data['model']} "
-                    f"status {data['status']} destination {data['destination']}.")
-            return f"Error: could not add vehicle ({response.status_code})."
-    except httpx.TimeoutException:
-        return "Error: timeout while adding vehicle."
-    except Exception as e:
-        return f"Error adding vehicle: {e}"
+    global _IDS_FETCHED_AT
+    payload = {
+        "make": make,
+        "model": model,
+        "status": status,
+        "destination": destination,
+    }
+    response = await _HTTP.post("/vehicles", json=payload)
+    if response.status_code in (200, 201):
+        _IDS_FETCHED_AT = float("-inf")
+        data = response.json()
+        return (
+            f"Added vehicle {data['id']}: {data['make']} {data['model']} "
+            f"status {data['status']} destination {data['destination']}.")
+    return f"Error: could not add vehicle ({response.status_code})."
 
 
 @mcp.tool()
+@http_tool("updating status of vehicle {vehicle_id}")
 async def change_status(vehicle_id: str, new_status: str) -> str:
     """Update the status of a vehicle identified by ID.
 
@@ -167,24 +271,29 @@ async def change_status(vehicle_id: str, new_status: str) -> str:
     `get_vehicle_details`). Returns the updated record or a meaningful error.
     If the ID does not exist, the response suggests similar available IDs.
     """
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.patch(
-                f"{DATA_SOURCE_URL}/vehicles/{vehicle_id}", params={'status': new_status}
-            )
-            if response.status_code == 200:
-                data = response.json()
-                return f"Updated vehicle {vehicle_id} status to {data['status']}."
-            if response.status_code == 404:
-                vehicles = await list_vehicles_internal()
-                suggestions = ", ".join(v['id'] for v in vehicles[:3])
-                return (f"Error: Vehicle {vehicle_id} not found. "
-                        f"Available IDs include {suggestions}.")
-            return f"Error: could not change status ({response.status_code})."
-    except httpx.TimeoutException:
-        return "Error: timeout while attempting to change status."
-    except Exception as e:
-        return f"Error updating status: {e}"
+    response = await _HTTP.patch(
+        f"/vehicles/{vehicle_id}", params={'status': new_status}
+    )
+    if response.status_code == 200:
+        data = response.json()
+        return f"Updated vehicle {vehicle_id} status to {data['status']}."
+    if response.status_code == 404:
+        suggestions = ", ".join((await _known_ids())[:3])
+        if not suggestions:
+            return f"Error: Vehicle {vehicle_id} not found."
+        return (f"Error: Vehicle {vehicle_id} not found. "
+                f"Available IDs include {suggestions}.")
+    return f"Error: could not change status ({response.status_code})."
 
 if __name__ == "__main__":
-    mcp.run(transport="sse", host="127.0.0.1", port=8000)
\ No newline at end of file
+    import importlib.util
+
+    import anyio
+    # stdio (the default) is what mcp_client.py spawns; MCP_TRANSPORT=http
+    # serves streamable HTTP on port 8000 for clients on another host
+    transport = os.getenv("MCP_TRANSPORT", "stdio")
+    kwargs = {} if transport == "stdio" else {"host": "127.0.0.1", "port": 8000}
+    # run on uvloop where it is installed (it isn't available on Windows)
+    use_uvloop = importlib.util.find_spec("uvloop") is not None
+    anyio.run(functools.partial(mcp.run_async, transport, **kwargs),
+              backend_options={"use_uvloop": use_uvloop})